@@ -2,16 +2,22 @@
 Core geofence detection logic.
 """
 import logging
+import threading
 from typing import List, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from app.models import Zone, ZoneTransition, LocationEvent
 from app.state import state_manager
-from app.zones import find_zone, load_zones
+from app.zones import ZoneIndex, load_zone_bounds, load_zones
 
 logger = logging.getLogger(__name__)
 
 # Cache loaded zones
 _zones_cache: Optional[List[Zone]] = None
+# Cache zone lookup index used on the hot path
+_zone_index_cache: Optional[ZoneIndex] = None
+# Handlers run on a threadpool; build the index only once
+_zone_index_lock = threading.Lock()
 
 
 def get_zones() -> list[Zone]:
@@ -22,86 +28,116 @@ def get_zones() -> list[Zone]:
     return _zones_cache
 
 
-def normalize_coordinate(coord: str) -> float:
+def get_zone_index() -> ZoneIndex:
+    """Get the lookup index for the cached zones, building it if needed."""
+    global _zone_index_cache
+    if _zone_index_cache is None:
+        with _zone_index_lock:
+            if _zone_index_cache is None:
+                _zone_index_cache = ZoneIndex(*load_zone_bounds(get_zones()))
+    return _zone_index_cache
+
+
+def process_location_event(
+    event: LocationEvent, now: Optional[datetime] = None
+) -> Tuple[Optional[str], ZoneTransition]:
     """
-    Normalize GPS coordinate string to float.
-    
-    Handles invalid values like 'D$Q', '-', etc. by converting to 0.0.
+    Process a location event and determine zone transitions.
     
     Args:
-        coord: Coordinate string (may be invalid)
+        event: LocationEvent to process
+        now: Timestamp to use when the event has none (defaults to current UTC time)
         
     Returns:
-        Normalized float value
+        Tuple of (new_zone_id, transition_type)
     """
-    if coord is None:
-        return 0.0
-    
-    coord_str = str(coord).strip().upper()
+    # Coordinates are normalized by LocationEvent validation
+    lat = event.latitude
+    lng = event.longitude
     
-    # Handle known invalid patterns
-    if coord_str in ['D$Q', '-', '', 'NAN', 'NONE', 'NULL']:
-        logger.debug(f"Normalizing invalid coordinate '{coord}' to 0.0")
-        return 0.0
+    # Find which zone (if any) contains the new location
+    index = get_zone_index()
+    if lat == 0.0 and lng == 0.0:
+        # Invalid GPS values normalize to (0, 0): skip the lookup
+        state_manager.record_null_locations()
+        new_zone_id = index.origin_zone
+    else:
+        new_zone_id = index.find(lat, lng)
     
-    try:
-        value = float(coord_str)
-        # Validate reasonable GPS range
-        if abs(value) > 180:
-            logger.warning(f"Coordinate {value} out of valid range, setting to 0.0")
-            return 0.0
-        return value
-    except (ValueError, TypeError) as e:
-        logger.warning(f"Could not parse coordinate '{coord}': {e}, setting to 0.0")
-        return 0.0
+    # Only read the clock when neither the event nor the caller supplied a time
+    timestamp = event.timestamp or now or datetime.utcnow()
+    transition = _apply_location(event, lat, lng, new_zone_id, timestamp)
+    return new_zone_id, transition
 
 
-def process_location_event(event: LocationEvent) -> Tuple[Optional[str], ZoneTransition]:
+def process_location_events(
+    events: List[LocationEvent], now: Optional[datetime] = None
+) -> List[Tuple[Optional[str], ZoneTransition]]:
     """
-    Process a location event and determine zone transitions.
+    Process a batch of location events and determine zone transitions.
+    
+    Zone lookups for the whole batch run as one vectorized containment test;
+    vehicle state is then updated in event order, so several events for the
+    same vehicle produce the same transitions as posting them one by one.
     
     Args:
-        event: LocationEvent to process
+        events: LocationEvents to process, in arrival order
+        now: Timestamp to use for events without one (defaults to current UTC time)
         
     Returns:
-        Tuple of (new_zone_id, transition_type)
+        List of (new_zone_id, transition_type) tuples, one per event
     """
-    # Normalize coordinates
-    lat = normalize_coordinate(event.latitude)
-    lng = normalize_coordinate(event.longitude)
-    
-    # Get current vehicle state
-    vehicle_state = state_manager.get_vehicle(event.vehicle_id)
-    old_zone_id = vehicle_state.current_zone
-    
-    # Find which zone (if any) contains the new location
-    zones = get_zones()
-    new_zone = find_zone(lat, lng, zones)
-    new_zone_id = new_zone.zone_id if new_zone else None
-    
-    # Determine transition type
-    if old_zone_id is None and new_zone_id is not None:
-        transition = ZoneTransition.ENTER
-    elif old_zone_id is not None and new_zone_id is None:
-        transition = ZoneTransition.EXIT
-    elif old_zone_id != new_zone_id and old_zone_id is not None and new_zone_id is not None:
-        transition = ZoneTransition.CHANGE
-    else:
-        # No zone change (staying in same zone or still outside)
-        transition = None
+    count = len(events)
+    lats = np.fromiter((e.latitude for e in events), dtype=np.float64, count=count)
+    lngs = np.fromiter((e.longitude for e in events), dtype=np.float64, count=count)
     
-    # Update vehicle state
-    timestamp = event.timestamp or datetime.utcnow()
-    vehicle_state.update_location(lat, lng, timestamp)
+    new_zone_ids = get_zone_index().find_many(lats, lngs)
+    null_count = int(np.count_nonzero((lats == 0.0) & (lngs == 0.0)))
+    if null_count:
+        state_manager.record_null_locations(null_count)
     
-    if transition:
-        vehicle_state.update_zone(new_zone_id, transition, timestamp)
-        state_manager.update_zone_count(old_zone_id, new_zone_id)
-        logger.info(
-            f"Vehicle {event.vehicle_id}: {transition.value} "
-            f"from {old_zone_id} to {new_zone_id}"
-        )
-    # If no transition, location is updated but zone state remains the same
+    # Read the clock once for the whole batch
+    now = now or datetime.utcnow()
     
-    return new_zone_id, transition
+    results = []
+    for event, lat, lng, new_zone_id in zip(events, lats.tolist(), lngs.tolist(), new_zone_ids):
+        transition = _apply_location(event, lat, lng, new_zone_id, event.timestamp or now)
+        results.append((new_zone_id, transition))
+    return results
+
 
+def _apply_location(
+    event: LocationEvent, lat: float, lng: float, new_zone_id: Optional[str], timestamp: datetime
+) -> Optional[ZoneTransition]:
+    """Update vehicle state for a resolved location and return the transition, if any."""
+    # Hold the vehicle's shard lock so concurrent events for the same
+    # vehicle see each other's zone updates
+    with state_manager.vehicle_lock(event.vehicle_id):
+        # Get current vehicle state
+        vehicle_state = state_manager.get_vehicle(event.vehicle_id)
+        old_zone_id = vehicle_state.current_zone
+        
+        # Determine transition type
+        if old_zone_id is None and new_zone_id is not None:
+            transition = ZoneTransition.ENTER
+        elif old_zone_id is not None and new_zone_id is None:
+            transition = ZoneTransition.EXIT
+        elif old_zone_id != new_zone_id and old_zone_id is not None and new_zone_id is not None:
+            transition = ZoneTransition.CHANGE
+        else:
+            # No zone change (staying in same zone or still outside)
+            transition = None
+        
+        # Update vehicle state
+        vehicle_state.update_location(lat, lng, timestamp)
+        
+        if transition:
+            vehicle_state.update_zone(new_zone_id, transition, timestamp)
+            state_manager.update_zone_count(old_zone_id, new_zone_id)
+            logger.info(
+                f"Vehicle {event.vehicle_id}: {transition.value} "
+                f"from {old_zone_id} to {new_zone_id}"
+            )
+        # If no transition, location is updated but zone state remains the same
+        
+    return transition
@@ -5,12 +5,12 @@ import logging
 from datetime import datetime
 from typing import List, Dict
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.models import LocationEvent, VehicleStatus, ZoneInfo, HealthResponse, ZoneTransition
-from app.logic import process_location_event, get_zones
+from app.kernels import warm_up
+from app.logic import process_location_event, process_location_events, get_zones, get_zone_index
 from app.state import state_manager
-from app.zones import load_zones
 
 # Configure logging
 logging.basicConfig(
@@ -23,7 +23,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Geofence Event Processing Service",
     description="Microservice for processing GPS events and detecting zone entry/exit",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -31,8 +32,11 @@ app = FastAPI(
 async def startup_event():
     """Initialize service on startup."""
     try:
-        # Pre-load zones
-        zones = load_zones()
+        # Pre-load zones and build the lookup index before serving traffic
+        get_zone_index()
+        zones = get_zones()
+        # Compile lookup kernels before serving traffic
+        warm_up()
         logger.info(f"Service started. Loaded {len(zones)} zones.")
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -52,11 +56,12 @@ async def root() -> Dict[str, str]:
 
 
 @app.post("/events/location", status_code=status.HTTP_200_OK)
-async def post_location_event(event: LocationEvent) -> Dict:
+def post_location_event(event: LocationEvent) -> Dict:
     """
     Process a GPS location event from a vehicle.
     
-    Detects zone entry, exit, or change transitions.
+    Detects zone entry, exit, or change transitions. Declared sync so FastAPI
+    runs it on its threadpool instead of blocking the event loop.
     
     Args:
         event: LocationEvent with vehicle_id, latitude, longitude, timestamp
@@ -65,13 +70,15 @@ async def post_location_event(event: LocationEvent) -> Dict:
         Dict with vehicle_id, current_zone, and transition information
     """
     try:
-        new_zone_id, transition = process_location_event(event)
+        # Read the clock once per request and share it with processing
+        now = datetime.utcnow()
+        new_zone_id, transition = process_location_event(event, now=now)
         
         response = {
             "vehicle_id": event.vehicle_id,
             "current_zone": new_zone_id,
             "transition": transition.value if transition else None,
-            "timestamp": (event.timestamp or datetime.utcnow()).isoformat()
+            "timestamp": (event.timestamp or now).isoformat()
         }
         
         return response
@@ -84,8 +91,45 @@ async def post_location_event(event: LocationEvent) -> Dict:
         )
 
 
-@app.get("/vehicles/{vehicle_id}/status", response_model=VehicleStatus)
-async def get_vehicle_status(vehicle_id: str) -> VehicleStatus:
+@app.post("/events/location/batch", status_code=status.HTTP_200_OK)
+def post_location_events_batch(events: List[LocationEvent]) -> List[Dict]:
+    """
+    Process a batch of GPS location events in a single request.
+    
+    Events are applied in order, so multiple events for the same vehicle
+    produce the same transitions as individual posts. Runs on the threadpool
+    like the single-event endpoint.
+    
+    Args:
+        events: List of LocationEvents
+        
+    Returns:
+        List of dicts with vehicle_id, current_zone, and transition information
+    """
+    try:
+        now = datetime.utcnow()
+        results = process_location_events(events, now=now)
+        
+        return [
+            {
+                "vehicle_id": event.vehicle_id,
+                "current_zone": new_zone_id,
+                "transition": transition.value if transition else None,
+                "timestamp": (event.timestamp or now).isoformat()
+            }
+            for event, (new_zone_id, transition) in zip(events, results)
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error processing location event batch: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing event batch: {str(e)}"
+        )
+
+
+@app.get("/vehicles/{vehicle_id}/status", response_model=None)
+def get_vehicle_status(vehicle_id: str) -> VehicleStatus:
     """
     Get current status of a vehicle.
     
@@ -96,8 +140,7 @@ async def get_vehicle_status(vehicle_id: str) -> VehicleStatus:
         VehicleStatus with current zone, location, and transition history
     """
     try:
-        vehicle_state = state_manager.get_vehicle(vehicle_id)
-        return vehicle_state.to_status()
+        return state_manager.get_vehicle_status(vehicle_id)
         
     except Exception as e:
         logger.error(f"Error getting vehicle status: {e}", exc_info=True)
@@ -107,7 +150,7 @@ async def get_vehicle_status(vehicle_id: str) -> VehicleStatus:
         )
 
 
-@app.get("/zones", response_model=List[ZoneInfo])
+@app.get("/zones", response_model=None)
 async def get_zones_info() -> List[ZoneInfo]:
     """
     Get information about all zones (for debugging).
@@ -144,7 +187,7 @@ async def get_zones_info() -> List[ZoneInfo]:
         )
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", response_model=None)
 async def health_check() -> HealthResponse:
     """
     Health check endpoint.
@@ -152,14 +195,14 @@ async def health_check() -> HealthResponse:
     Returns:
         HealthResponse with service status
     """
-    return HealthResponse()
+    return HealthResponse(null_location_events=state_manager.get_null_location_count())
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"}
     )
@@ -167,5 +210,7 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Vehicle state lives in this process, so a single worker is used;
+    # uvloop/httptools speed up dispatch of the many small event POSTs
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
 
@@ -1,11 +1,52 @@
 """
 Pydantic models for geofence event processing service.
 """
-from typing import Optional, List, Dict
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Sequence
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+# Known invalid GPS placeholders (compared after strip/upper)
+INVALID_COORDINATES = frozenset({"D$Q", "-", "", "NAN", "NONE", "NULL"})
+
+
+def parse_coordinate(value: object) -> float:
+    """
+    Parse a raw GPS coordinate to float.
+    
+    Invalid values like 'D$Q', '-', unparseable strings and coordinates
+    outside the valid GPS range are normalized to 0.0.
+    
+    Args:
+        value: Raw coordinate (string, number or None)
+        
+    Returns:
+        Normalized float value
+    """
+    if value is None:
+        return 0.0
+    
+    value_str = str(value).strip().upper()
+    if value_str in INVALID_COORDINATES:
+        return 0.0
+    
+    try:
+        coord = float(value_str)
+    except (ValueError, TypeError) as e:
+        # Garbage input is expected here and counted via null_location_events
+        logger.debug(f"Could not parse coordinate '{value}': {e}, setting to 0.0")
+        return 0.0
+    
+    # Validate reasonable GPS range
+    if abs(coord) > 180:
+        logger.warning(f"Coordinate {coord} out of valid range, setting to 0.0")
+        return 0.0
+    return coord
+
 
 class ZoneTransition(str, Enum):
     """Zone transition types."""
@@ -17,24 +58,15 @@ class ZoneTransition(str, Enum):
 class LocationEvent(BaseModel):
     """GPS location event from vehicle."""
     vehicle_id: str = Field(..., description="Unique vehicle identifier")
-    latitude: str = Field(..., description="Latitude (may be invalid like 'D$Q' or '-')")
-    longitude: str = Field(..., description="Longitude (may be invalid like 'D$Q' or '-')")
-    timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow, description="Event timestamp")
+    latitude: float = Field(..., description="Latitude (invalid values like 'D$Q' or '-' become 0.0)")
+    longitude: float = Field(..., description="Longitude (invalid values like 'D$Q' or '-' become 0.0)")
+    timestamp: Optional[datetime] = Field(None, description="Event timestamp (server time is used when omitted)")
 
     @field_validator("latitude", "longitude", mode="before")
     @classmethod
-    def normalize_coordinates(cls, v: object) -> str:
-        """Normalize invalid GPS values to 0.0-compatible strings."""
-        if v is None:
-            return "0.0"
-        v_str = str(v).strip().upper()
-        if v_str in ["D$Q", "-", "", "NAN", "NONE", "NULL"]:
-            return "0.0"
-        try:
-            float(v_str)
-            return v_str
-        except (ValueError, TypeError):
-            return "0.0"
+    def normalize_coordinates(cls, v: object) -> float:
+        """Normalize invalid GPS values to 0.0."""
+        return parse_coordinate(v)
 
 
 class Zone(BaseModel):
@@ -54,27 +86,34 @@ class Zone(BaseModel):
         )
 
 
-class VehicleStatus(BaseModel):
+# Outbound-only response shapes are plain dataclasses: they are built from
+# trusted in-memory state, so skipping Pydantic validation is safe.
+
+
+@dataclass(slots=True)
+class VehicleStatus:
     """Current status of a vehicle."""
     vehicle_id: str
-    current_zone: Optional[str] = Field(None, description="Current zone ID, None if outside all zones")
-    last_update: Optional[datetime] = Field(None, description="Last location update timestamp")
-    last_latitude: Optional[float] = Field(None, description="Last known latitude")
-    last_longitude: Optional[float] = Field(None, description="Last known longitude")
-    transition_history: List[Dict] = Field(default_factory=list, description="Recent transition events")
+    current_zone: Optional[str] = None  # Current zone ID, None if outside all zones
+    last_update: Optional[datetime] = None  # Last location update timestamp
+    last_latitude: Optional[float] = None  # Last known latitude
+    last_longitude: Optional[float] = None  # Last known longitude
+    transition_history: Sequence[Dict] = ()  # Recent transition events, oldest first
 
 
-class ZoneInfo(BaseModel):
+@dataclass(slots=True)
+class ZoneInfo:
     """Zone information for debugging."""
     zone_id: str
     name: str
     bounds: Dict[str, float]
-    vehicle_count: int = Field(0, description="Number of vehicles currently in this zone")
+    vehicle_count: int = 0  # Number of vehicles currently in this zone
 
 
-class HealthResponse(BaseModel):
+@dataclass(slots=True)
+class HealthResponse:
     """Health check response."""
     status: str = "healthy"
     service: str = "geofence_event_processing"
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    null_location_events: int = 0  # Events received with invalid/(0, 0) coordinates
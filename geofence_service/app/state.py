@@ -1,10 +1,15 @@
 """
 In-memory state management for vehicle locations and zone tracking.
 """
-from typing import Dict, Optional, List
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, List
 from datetime import datetime
 from app.models import VehicleStatus, ZoneTransition
 
+# Number of vehicle shards (must be a power of two)
+SHARD_COUNT = 16
+
 
 class VehicleState:
     """In-memory state for a single vehicle."""
@@ -14,7 +19,8 @@ class VehicleState:
         self.last_update: Optional[datetime] = None
         self.last_latitude: Optional[float] = None
         self.last_longitude: Optional[float] = None
-        self.transition_history: List[Dict] = []
+        # Keep only last 100 transitions per vehicle; older ones are evicted on append
+        self.transition_history: Deque[Dict] = deque(maxlen=100)
 
     def update_location(self, lat: float, lng: float, timestamp: datetime):
         """Update vehicle location."""
@@ -34,51 +40,106 @@ class VehicleState:
             "timestamp": timestamp.isoformat()
         }
         self.transition_history.append(transition_record)
-        
-        # Keep only last 100 transitions per vehicle
-        if len(self.transition_history) > 100:
-            self.transition_history = self.transition_history[-100:]
 
     def to_status(self) -> VehicleStatus:
-        """Convert to VehicleStatus model."""
+        """
+        Convert to VehicleStatus model.
+        
+        The history is snapshotted as a tuple because the response is
+        serialized after the vehicle's lock is released, while new
+        transitions may be appended to the live deque.
+        """
         return VehicleStatus(
             vehicle_id=self.vehicle_id,
             current_zone=self.current_zone,
             last_update=self.last_update,
             last_latitude=self.last_latitude,
             last_longitude=self.last_longitude,
-            transition_history=self.transition_history.copy()
+            transition_history=tuple(self.transition_history)
         )
 
 
 class StateManager:
-    """Global state manager for all vehicles."""
-    def __init__(self):
-        self._vehicles: Dict[str, VehicleState] = {}
+    """
+    Global state manager for all vehicles.
+    
+    Vehicles are spread over a fixed number of shards, each guarded by its
+    own lock, so concurrent requests for different vehicles rarely contend.
+    Callers that read and then update a vehicle hold vehicle_lock() for the
+    whole sequence.
+    """
+    def __init__(self, shard_count: int = SHARD_COUNT):
+        self._shard_mask = shard_count - 1
+        self._shards: List[Dict[str, VehicleState]] = [{} for _ in range(shard_count)]
+        self._locks: List[threading.RLock] = [threading.RLock() for _ in range(shard_count)]
         self._zone_counts: Dict[str, int] = {}  # zone_id -> vehicle count
+        self._zone_lock = threading.Lock()
+        self._null_location_count = 0  # events whose coordinates normalized to (0, 0)
+        self._stats_lock = threading.Lock()
+
+    def _shard_index(self, vehicle_id: str) -> int:
+        return hash(vehicle_id) & self._shard_mask
+
+    def vehicle_lock(self, vehicle_id: str) -> threading.RLock:
+        """Get the (reentrant) lock guarding a vehicle's shard."""
+        return self._locks[self._shard_index(vehicle_id)]
 
     def get_vehicle(self, vehicle_id: str) -> VehicleState:
         """Get or create vehicle state."""
-        if vehicle_id not in self._vehicles:
-            self._vehicles[vehicle_id] = VehicleState(vehicle_id)
-        return self._vehicles[vehicle_id]
+        index = self._shard_index(vehicle_id)
+        shard = self._shards[index]
+        vehicle = shard.get(vehicle_id)
+        if vehicle is None:
+            with self._locks[index]:
+                vehicle = shard.get(vehicle_id)
+                if vehicle is None:
+                    vehicle = shard[vehicle_id] = VehicleState(vehicle_id)
+        return vehicle
+
+    def get_vehicle_status(self, vehicle_id: str) -> VehicleStatus:
+        """Get a consistent status snapshot of a vehicle."""
+        with self.vehicle_lock(vehicle_id):
+            return self.get_vehicle(vehicle_id).to_status()
 
     def update_zone_count(self, old_zone: Optional[str], new_zone: Optional[str]):
         """Update zone vehicle counts."""
-        if old_zone:
-            self._zone_counts[old_zone] = max(0, self._zone_counts.get(old_zone, 0) - 1)
-        if new_zone:
-            self._zone_counts[new_zone] = self._zone_counts.get(new_zone, 0) + 1
+        with self._zone_lock:
+            if old_zone:
+                self._zone_counts[old_zone] = max(0, self._zone_counts.get(old_zone, 0) - 1)
+            if new_zone:
+                self._zone_counts[new_zone] = self._zone_counts.get(new_zone, 0) + 1
 
     def get_zone_count(self, zone_id: str) -> int:
         """Get current vehicle count for a zone."""
         return self._zone_counts.get(zone_id, 0)
 
+    def record_null_locations(self, count: int = 1):
+        """Count events whose coordinates normalized to (0, 0)."""
+        with self._stats_lock:
+            self._null_location_count += count
+
+    def get_null_location_count(self) -> int:
+        """Get the number of events received with (0, 0) coordinates."""
+        return self._null_location_count
+
     def get_all_vehicles(self) -> Dict[str, VehicleState]:
         """Get all vehicle states."""
-        return self._vehicles.copy()
+        vehicles: Dict[str, VehicleState] = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                vehicles.update(shard)
+        return vehicles
+
+    def clear(self):
+        """Drop all vehicle state and zone counts."""
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+        with self._zone_lock:
+            self._zone_counts.clear()
+        with self._stats_lock:
+            self._null_location_count = 0
 
 
 # Global state instance
 state_manager = StateManager()
-
@@ -1,14 +1,24 @@
 """
 Zone loading and management.
 """
+import bisect
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import numpy as np
+from app.kernels import find_zone_batch, find_zone_index
 from app.models import Zone
 
 logger = logging.getLogger(__name__)
 
+# Lookup grid resolution in degrees; coarsened until the grid fits GRID_MAX_CELLS
+GRID_STEP = 0.001
+GRID_MAX_CELLS = 1 << 18
+# Grid cell codes besides zone row indices
+GRID_EMPTY = -1  # No zone touches the cell
+GRID_MIXED = -2  # Cell straddles a zone edge; resolve with an exact check
+
 
 def load_zones(zones_file: str = "zones.json") -> List[Zone]:
     """
@@ -75,20 +85,213 @@ def _get_default_zones() -> List[Zone]:
     ]
 
 
-def find_zone(lat: float, lng: float, zones: List[Zone]) -> Optional[Zone]:
+def build_zone_bounds(zones: List[Zone]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack zones into contiguous arrays for vectorized containment checks.
+    
+    Args:
+        zones: List of zones, in lookup priority order
+        
+    Returns:
+        Tuple of (bounds, zone_ids) where bounds is an (N, 4) float64 array of
+        [min_lat, max_lat, min_lng, max_lng] rows and zone_ids is the parallel
+        object array of zone identifiers
+    """
+    bounds = np.array(
+        [[z.min_lat, z.max_lat, z.min_lng, z.max_lng] for z in zones],
+        dtype=np.float64
+    ).reshape(len(zones), 4)
+    zone_ids = np.array([z.zone_id for z in zones], dtype=object)
+    return bounds, zone_ids
+
+
+def load_zone_bounds(zones: List[Zone]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get packed zone bounds for serving, with the bounds array read-only.
+    
+    The lookup index keeps references to the bounds, so they are frozen
+    rather than copied to guard against accidental writes.
+    
+    Args:
+        zones: List of zones, in lookup priority order
+        
+    Returns:
+        Tuple of (bounds, zone_ids) as from build_zone_bounds, with bounds
+        read-only
+    """
+    bounds, zone_ids = build_zone_bounds(zones)
+    bounds.setflags(write=False)
+    return bounds, zone_ids
+
+
+def find_zone(lat: float, lng: float, bounds: np.ndarray, zone_ids: np.ndarray) -> Optional[str]:
     """
     Find which zone (if any) contains the given coordinates.
     
     Args:
         lat: Latitude
         lng: Longitude
-        zones: List of zones to check
+        bounds: (N, 4) zone bounds array from build_zone_bounds
+        zone_ids: Zone identifiers parallel to bounds
+        
+    Returns:
+        ID of the first zone containing the point, None otherwise
+    """
+    idx = find_zone_index(lat, lng, bounds)
+    if idx < 0:
+        return None
+    return zone_ids[idx]
+
+
+def find_zones(lats: np.ndarray, lngs: np.ndarray, bounds: np.ndarray, zone_ids: np.ndarray) -> np.ndarray:
+    """
+    Find the containing zone for a batch of coordinates in one compiled pass.
+    
+    Args:
+        lats: Latitudes, shape (B,)
+        lngs: Longitudes, shape (B,)
+        bounds: (N, 4) zone bounds array from build_zone_bounds
+        zone_ids: Zone identifiers parallel to bounds
         
     Returns:
-        Zone object if found, None otherwise
+        Object array of shape (B,) with the first matching zone ID per point, or None
+    """
+    idx = np.empty(lats.shape[0], dtype=np.int64)
+    find_zone_batch(lats, lngs, bounds, idx)
+    
+    result = np.full(lats.shape[0], None, dtype=object)
+    found = idx >= 0
+    result[found] = zone_ids[idx[found]]
+    return result
+
+
+class ZoneIndex:
     """
-    for zone in zones:
-        if zone.contains(lat, lng):
-            return zone
-    return None
+    Grid and latitude slab index over packed zone bounds.
+    
+    Zones are first rasterized onto a coarse grid over their combined extent.
+    Each cell stores the answer for every point in it when that answer is
+    unambiguous (a single zone index, or empty), so most lookups are one
+    list access regardless of how many zones exist.
+    
+    Points in cells that straddle a zone edge fall back to the slab index:
+    the sorted, de-duplicated zone latitude edges split the map into slabs.
+    For each edge we precompute which zones span it, so a lookup is a binary
+    search for the slab followed by an exact check against only those
+    candidate zones instead of every zone.
+    
+    Single-point lookups only touch plain Python floats and per-slab lists of
+    (min_lat, max_lat, min_lng, max_lng, zone_id) tuples prepared at build
+    time: for the handful of candidates in a slab, a tuple scan is far
+    cheaper than NumPy or compiled-kernel call overhead, and it never goes
+    through model attribute access.
+    """
+    def __init__(self, bounds: np.ndarray, zone_ids: np.ndarray):
+        self.bounds = bounds
+        self.zone_ids = zone_ids
+        edges = np.unique(bounds[:, :2])
+        
+        spans = (
+            (bounds[:, 0] <= edges[:, None]) &
+            (bounds[:, 1] >= edges[:, None])
+        )
+        zone_tuples = [
+            (min_lat, max_lat, min_lng, max_lng, zone_id)
+            for (min_lat, max_lat, min_lng, max_lng), zone_id in zip(bounds.tolist(), zone_ids)
+        ]
+        
+        self._edges: List[float] = edges.tolist()
+        # flatnonzero keeps zone priority order within each slab
+        self._slabs: List[List[tuple]] = [
+            [zone_tuples[i] for i in np.flatnonzero(row)]
+            for row in spans
+        ]
+        
+        self._build_grid(bounds)
+        # Invalid coordinates normalize to (0, 0); resolve that point once
+        self.origin_zone: Optional[str] = self.find(0.0, 0.0)
+
+    def _build_grid(self, bounds: np.ndarray) -> None:
+        """Rasterize zones onto the lookup grid."""
+        self._zone_id_list: List[str] = list(self.zone_ids)
+        if bounds.shape[0] == 0:
+            # Empty extent: every point is rejected by the range check
+            self._lat0 = self._lng0 = float('inf')
+            self._lat1 = self._lng1 = float('-inf')
+            return
+        
+        lat0, lat1 = float(bounds[:, 0].min()), float(bounds[:, 1].max())
+        lng0, lng1 = float(bounds[:, 2].min()), float(bounds[:, 3].max())
+        step = GRID_STEP
+        while True:
+            inv_step = 1.0 / step
+            height = int((lat1 - lat0) * inv_step) + 1
+            width = int((lng1 - lng0) * inv_step) + 1
+            if height * width <= GRID_MAX_CELLS:
+                break
+            step *= 2
+        
+        # Cells are addressed with the same float expression used by find(),
+        # which is monotonic in the coordinate: any point inside a zone lands
+        # in the zone's [first, last] cell range, and any point landing
+        # strictly between the first and last cell is inside the zone.
+        count = bounds.shape[0]
+        first = np.full((height, width), count, dtype=np.int64)
+        covered = np.zeros((height, width), dtype=bool)
+        # Walk from lowest to highest priority so each cell ends up describing
+        # the highest-priority zone that touches it
+        for i in range(count - 1, -1, -1):
+            min_lat, max_lat, min_lng, max_lng = bounds[i].tolist()
+            r0, r1 = int((min_lat - lat0) * inv_step), int((max_lat - lat0) * inv_step)
+            c0, c1 = int((min_lng - lng0) * inv_step), int((max_lng - lng0) * inv_step)
+            first[r0:r1 + 1, c0:c1 + 1] = i
+            covered[r0:r1 + 1, c0:c1 + 1] = False
+            covered[r0 + 1:r1, c0 + 1:c1] = True
+        
+        grid = np.where(first == count, GRID_EMPTY, np.where(covered, first, GRID_MIXED))
+        
+        self._lat0, self._lat1, self._lng0, self._lng1 = lat0, lat1, lng0, lng1
+        self._inv_step = inv_step
+        self._grid_width = width
+        self._grid_cells: List[int] = grid.ravel().tolist()
+
+    def find(self, lat: float, lng: float) -> Optional[str]:
+        """
+        Find which zone (if any) contains the given coordinates.
+        
+        Args:
+            lat: Latitude
+            lng: Longitude
+            
+        Returns:
+            ID of the first zone containing the point, None otherwise
+        """
+        if not (self._lat0 <= lat <= self._lat1 and self._lng0 <= lng <= self._lng1):
+            return None
+        
+        cell = self._grid_cells[
+            int((lat - self._lat0) * self._inv_step) * self._grid_width +
+            int((lng - self._lng0) * self._inv_step)
+        ]
+        if cell >= 0:
+            return self._zone_id_list[cell]
+        if cell == GRID_EMPTY:
+            return None
+        
+        for min_lat, max_lat, min_lng, max_lng, zone_id in self._slabs[bisect.bisect_right(self._edges, lat) - 1]:
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                return zone_id
+        return None
 
+    def find_many(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """
+        Find the containing zone for a batch of coordinates.
+        
+        Args:
+            lats: Latitudes, shape (B,)
+            lngs: Longitudes, shape (B,)
+            
+        Returns:
+            Object array of shape (B,) with the first matching zone ID per point, or None
+        """
+        return find_zones(lats, lngs, self.bounds, self.zone_ids)
@@ -1,40 +1,60 @@
 """
 Unit tests for geofence logic.
 """
+import threading
 import pytest
+import numpy as np
 from datetime import datetime
-from app.models import LocationEvent, Zone
-from app.logic import normalize_coordinate, process_location_event, get_zones
+from app.models import LocationEvent, Zone, parse_coordinate
+import app.logic
+from app.logic import process_location_event, process_location_events, get_zones, get_zone_index
 from app.state import state_manager
-from app.zones import find_zone
+from app.zones import ZoneIndex, build_zone_bounds, find_zone, find_zones, load_zone_bounds
 
 
-class TestNormalizeCoordinate:
+class TestParseCoordinate:
     """Tests for coordinate normalization."""
     
     def test_valid_coordinate(self):
-        assert normalize_coordinate("37.7749") == 37.7749
-        assert normalize_coordinate("-122.4194") == -122.4194
-        assert normalize_coordinate("0") == 0.0
+        assert parse_coordinate("37.7749") == 37.7749
+        assert parse_coordinate("-122.4194") == -122.4194
+        assert parse_coordinate("0") == 0.0
     
     def test_invalid_patterns(self):
-        assert normalize_coordinate("D$Q") == 0.0
-        assert normalize_coordinate("-") == 0.0
-        assert normalize_coordinate("") == 0.0
-        assert normalize_coordinate("NAN") == 0.0
-        assert normalize_coordinate("NONE") == 0.0
-        assert normalize_coordinate("NULL") == 0.0
+        assert parse_coordinate("D$Q") == 0.0
+        assert parse_coordinate("-") == 0.0
+        assert parse_coordinate("") == 0.0
+        assert parse_coordinate("NAN") == 0.0
+        assert parse_coordinate("NONE") == 0.0
+        assert parse_coordinate("NULL") == 0.0
     
     def test_none_value(self):
-        assert normalize_coordinate(None) == 0.0
+        assert parse_coordinate(None) == 0.0
     
     def test_out_of_range(self):
-        assert normalize_coordinate("200") == 0.0
-        assert normalize_coordinate("-200") == 0.0
+        assert parse_coordinate("200") == 0.0
+        assert parse_coordinate("-200") == 0.0
     
-    def test_unparseable(self):
-        assert normalize_coordinate("abc") == 0.0
-        assert normalize_coordinate("12.34.56") == 0.0
+    def test_unparseable(self, caplog):
+        with caplog.at_level("DEBUG", logger="app.models"):
+            assert parse_coordinate("abc") == 0.0
+            assert parse_coordinate("12.34.56") == 0.0
+        assert not [r for r in caplog.records if r.levelname == "WARNING"]
+
+
+class TestLocationEventValidation:
+    """Tests for coordinate normalization during event validation."""
+    
+    def test_coordinates_parsed_to_float(self):
+        event = LocationEvent(vehicle_id="v", latitude="37.7749", longitude=-122.4194)
+        assert event.latitude == 37.7749
+        assert event.longitude == -122.4194
+    
+    def test_invalid_coordinates_normalized(self):
+        for raw in ["D$Q", "-", "", "nan", "null", "abc", "200", None]:
+            event = LocationEvent(vehicle_id="v", latitude=raw, longitude=raw)
+            assert event.latitude == 0.0
+            assert event.longitude == 0.0
 
 
 class TestZoneDetection:
@@ -43,8 +63,7 @@ class TestZoneDetection:
     def test_enter_zone(self):
         """Test entering a zone from outside."""
         # Reset state
-        state_manager._vehicles.clear()
-        state_manager._zone_counts.clear()
+        state_manager.clear()
         
         event = LocationEvent(
             vehicle_id="vehicle_1",
@@ -59,8 +78,7 @@ class TestZoneDetection:
     def test_exit_zone(self):
         """Test exiting a zone."""
         # Reset state
-        state_manager._vehicles.clear()
-        state_manager._zone_counts.clear()
+        state_manager.clear()
         
         # First enter a zone
         event1 = LocationEvent(
@@ -83,8 +101,7 @@ class TestZoneDetection:
     def test_change_zone(self):
         """Test changing from one zone to another."""
         # Reset state
-        state_manager._vehicles.clear()
-        state_manager._zone_counts.clear()
+        state_manager.clear()
         
         # Enter first zone
         event1 = LocationEvent(
@@ -107,8 +124,7 @@ class TestZoneDetection:
     def test_invalid_gps_normalization(self):
         """Test that invalid GPS values are normalized."""
         # Reset state
-        state_manager._vehicles.clear()
-        state_manager._zone_counts.clear()
+        state_manager.clear()
         
         event = LocationEvent(
             vehicle_id="vehicle_1",
@@ -119,6 +135,84 @@ class TestZoneDetection:
         new_zone_id, transition = process_location_event(event)
         # Should be outside all zones (0,0)
         assert new_zone_id is None or transition is None
+        assert state_manager.get_null_location_count() == 1
+    
+    def test_transition_history_bounded(self):
+        """Test that only the most recent transitions are kept."""
+        # Reset state
+        state_manager.clear()
+        
+        inside = LocationEvent(vehicle_id="vehicle_1", latitude="37.78", longitude="-122.41")
+        outside = LocationEvent(vehicle_id="vehicle_1", latitude="37.70", longitude="-122.50")
+        for _ in range(60):
+            process_location_event(inside)
+            process_location_event(outside)
+        
+        history = state_manager.get_vehicle("vehicle_1").to_status().transition_history
+        assert len(history) == 100
+        assert history[-1]["transition"] == "EXIT"
+    
+    def test_concurrent_events_keep_counts_consistent(self):
+        """Test that zone counts stay consistent under concurrent updates."""
+        state_manager.clear()
+        
+        inside = LocationEvent(vehicle_id="vehicle_1", latitude="37.78", longitude="-122.41")
+        outside = LocationEvent(vehicle_id="vehicle_1", latitude="37.70", longitude="-122.50")
+        
+        def worker():
+            for _ in range(200):
+                process_location_event(inside)
+                process_location_event(outside)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert state_manager.get_vehicle("vehicle_1").current_zone is None
+        assert state_manager.get_zone_count("zone_1") == 0
+    
+    def test_zone_index_built_once_under_concurrency(self, monkeypatch):
+        """Test that concurrent first lookups share a single index build."""
+        builds = []
+        zone_index = app.logic.ZoneIndex
+        
+        def counting_index(*args):
+            builds.append(threading.get_ident())
+            return zone_index(*args)
+        
+        monkeypatch.setattr(app.logic, "_zone_index_cache", None)
+        monkeypatch.setattr(app.logic, "ZoneIndex", counting_index)
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_zone_index())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(builds) == 1
+        assert all(index is results[0] for index in results)
+    
+    def test_batch_matches_sequential(self):
+        """Test that a batch applies events in order per vehicle."""
+        # Reset state
+        state_manager.clear()
+        
+        events = [
+            LocationEvent(vehicle_id="vehicle_1", latitude="37.78", longitude="-122.41"),
+            LocationEvent(vehicle_id="vehicle_2", latitude="D$Q", longitude="-"),
+            LocationEvent(vehicle_id="vehicle_1", latitude="37.625", longitude="-122.375"),
+            LocationEvent(vehicle_id="vehicle_1", latitude="37.70", longitude="-122.50"),
+        ]
+        
+        results = process_location_events(events)
+        transitions = [t.value if t else None for _, t in results]
+        assert transitions == ["ENTER", None, "CHANGE", "EXIT"]
+        assert results[0][0] == "zone_1"
+        assert results[2][0] == "zone_2"
+        assert state_manager.get_vehicle("vehicle_1").current_zone is None
 
 
 class TestZoneContains:
@@ -142,6 +236,80 @@ class TestZoneContains:
         assert zone.contains(37.5, -121.9) is False  # Above max_lng
 
 
+class TestFindZone:
+    """Tests for vectorized zone lookup."""
+    
+    def setup_method(self):
+        self.zones = [
+            Zone(zone_id="a", name="A", min_lat=0.0, max_lat=10.0, min_lng=0.0, max_lng=10.0),
+            Zone(zone_id="b", name="B", min_lat=5.0, max_lat=15.0, min_lng=5.0, max_lng=15.0),
+        ]
+        self.bounds, self.zone_ids = build_zone_bounds(self.zones)
+    
+    def test_build_zone_bounds(self):
+        assert self.bounds.shape == (2, 4)
+        assert self.bounds[1].tolist() == [5.0, 15.0, 5.0, 15.0]
+        assert list(self.zone_ids) == ["a", "b"]
+    
+    def test_point_inside(self):
+        assert find_zone(2.0, 2.0, self.bounds, self.zone_ids) == "a"
+        assert find_zone(12.0, 12.0, self.bounds, self.zone_ids) == "b"
+    
+    def test_point_outside(self):
+        assert find_zone(20.0, 20.0, self.bounds, self.zone_ids) is None
+    
+    def test_overlap_returns_first_zone(self):
+        assert find_zone(7.0, 7.0, self.bounds, self.zone_ids) == "a"
+    
+    def test_find_zones_batch(self):
+        lats = np.array([2.0, 7.0, 12.0, 20.0])
+        lngs = np.array([2.0, 7.0, 12.0, 20.0])
+        result = find_zones(lats, lngs, self.bounds, self.zone_ids)
+        assert list(result) == ["a", "a", "b", None]
+    
+    def test_no_zones(self):
+        bounds, zone_ids = build_zone_bounds([])
+        assert find_zone(1.0, 1.0, bounds, zone_ids) is None
+        assert list(find_zones(np.array([1.0]), np.array([1.0]), bounds, zone_ids)) == [None]
+        assert ZoneIndex(bounds, zone_ids).find(1.0, 1.0) is None
+    
+    def test_index_boundaries(self):
+        index = ZoneIndex(self.bounds, self.zone_ids)
+        assert index.find(0.0, 0.0) == "a"  # Lowest edge
+        assert index.find(10.0, 10.0) == "a"  # Shared edge keeps priority
+        assert index.find(15.0, 15.0) == "b"  # Highest edge
+        assert index.find(-0.1, 5.0) is None
+        assert index.find(15.1, 12.0) is None
+        assert index.origin_zone == "a"  # (0, 0) fast path honors zones covering the origin
+    
+    def test_index_matches_linear_scan(self):
+        rng = np.random.default_rng(0)
+        corners = rng.uniform(-10, 10, size=(40, 2, 2))
+        zones = [
+            Zone(
+                zone_id=f"z{i}", name=f"Z{i}",
+                min_lat=c[0].min(), max_lat=c[0].max(),
+                min_lng=c[1].min(), max_lng=c[1].max()
+            )
+            for i, c in enumerate(corners)
+        ]
+        bounds, zone_ids = build_zone_bounds(zones)
+        index = ZoneIndex(bounds, zone_ids)
+        
+        # Include exact zone edges to exercise inclusive boundaries
+        lats = np.concatenate([rng.uniform(-11, 11, 500), bounds[:, 0], bounds[:, 1]])
+        lngs = np.concatenate([rng.uniform(-11, 11, 500), bounds[:, 2], bounds[:, 3]])
+        for lat, lng in zip(lats, lngs):
+            assert index.find(lat, lng) == find_zone(lat, lng, bounds, zone_ids)
+    
+    def test_load_zone_bounds_read_only(self):
+        bounds, zone_ids = load_zone_bounds(self.zones)
+        assert not bounds.flags.writeable
+        np.testing.assert_array_equal(bounds, self.bounds)
+        assert find_zone(12.0, 12.0, bounds, zone_ids) == "b"
+        with pytest.raises(ValueError):
+            bounds[0, 0] = 0.0
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
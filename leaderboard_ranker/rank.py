@@ -9,12 +9,17 @@ Sorts a leaderboard Excel sheet according to:
 - Alphabetical fallback
 """
 import sys
-import json
+import warnings
+import orjson
+import xlsxwriter
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any
-from utils import clean_value, extract_player_rows, get_score_columns, calculate_countback, calculate_median_score
+from utils import classify_columns, clean_column, extract_player_rows, player_arrays, calculate_countback_matrix, countback_to_tuple
+
+# Padded length of countback tuples and sort keys
+COUNTBACK_LENGTH = 20
 
 
 def load_leaderboard(excel_path: str) -> pd.DataFrame:
@@ -35,12 +40,14 @@ def load_leaderboard(excel_path: str) -> pd.DataFrame:
         sys.exit(1)
 
 
-def process_leaderboard(df: pd.DataFrame) -> List[Dict[str, Any]]:
+def process_leaderboard(df: pd.DataFrame, engine: str = 'pandas') -> List[Dict[str, Any]]:
     """
     Process leaderboard and calculate rankings.
     
     Args:
         df: Raw dataframe from Excel
+        engine: Score cleaning engine, 'pandas' or 'polars' (optional
+            dependency, for large sheets)
         
     Returns:
         List of player dictionaries with calculated fields
@@ -52,73 +59,58 @@ def process_leaderboard(df: pd.DataFrame) -> List[Dict[str, Any]]:
         print("No player rows found in leaderboard")
         return []
     
-    # Identify columns
-    name_col = None
-    for col in player_df.columns:
-        col_lower = str(col).lower()
-        if any(keyword in col_lower for keyword in ['name', 'player', 'id', 'team']):
-            name_col = col
-            break
-    
-    if name_col is None:
-        name_col = player_df.columns[0]
-    
-    # Get score columns (exclude name, total, spend columns)
-    all_cols = [c for c in player_df.columns if c != name_col]
-    score_cols = get_score_columns(player_df)
-    
-    # Identify total and spend columns if they exist
-    total_col = None
-    spend_col = None
-    
-    for col in player_df.columns:
-        col_lower = str(col).lower()
-        if 'total' in col_lower and 'point' in col_lower:
-            total_col = col
-        elif 'spend' in col_lower:
-            spend_col = col
-    
-    # Process each player
+    # Player names and the (n_players, n_events) matrix of cleaned event scores
+    names, scores = player_arrays(player_df, engine=engine)
+    
+    # Calculate total points (sum of all event scores) and events played
+    total_points = scores.sum(axis=1)
+    num_events = (scores > 0).sum(axis=1)
+    
+    # Calculate median of non-zero scores (for additional tiebreaker)
+    positive_scores = np.where(scores > 0, scores, np.nan)
+    with warnings.catch_warnings():
+        # Players without any positive score produce an all-NaN row
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        median_scores = np.nan_to_num(np.nanmedian(positive_scores, axis=1), nan=0.0)
+    
+    # Get spend (from column if exists, otherwise 0)
+    spend_col = classify_columns(tuple(player_df.columns))[1]
+    if spend_col is not None:
+        spends = clean_column(player_df[spend_col])
+    else:
+        spends = np.zeros(len(player_df), dtype=np.float64)
+    
+    event_scores = scores.tolist()
+    
+    # Calculate countback for all players in one pass; the padded, negated
+    # rows rank the same as the countback tuples and serve as the sort key
+    countback_matrix = calculate_countback_matrix(scores)
+    countbacks = [countback_to_tuple(row) for row in countback_matrix.tolist()]
+    countback_keys = [tuple(row) for row in (-countback_matrix).tolist()]
+    
+    # Assemble player records
     players = []
     
-    for idx, row in player_df.iterrows():
-        player_name = str(row[name_col]).strip()
-        
-        # Extract all event scores
-        event_scores = []
-        for col in score_cols:
-            score = clean_value(row[col])
-            event_scores.append(score)
-        
-        # Calculate total points (sum of all event scores)
-        total_points = sum(event_scores)
-        
-        # Get spend (from column if exists, otherwise 0)
-        if spend_col and spend_col in row:
-            spend = clean_value(row[spend_col])
-        else:
-            spend = 0.0
-        
-        # Calculate countback
-        countback_tuple = calculate_countback(event_scores)
-        
-        # Calculate median score (for additional tiebreaker)
-        median_score = calculate_median_score(event_scores)
-        
+    for player_name, total, spend, countback_tuple, countback_key, median_score, row_scores, played, record in zip(
+        names.tolist(), total_points.tolist(), spends.tolist(), countbacks, countback_keys, median_scores.tolist(),
+        event_scores, num_events.tolist(), player_df.to_dict('records')
+    ):
         player_data = {
             'name': player_name,
-            'total_points': total_points,
+            'total_points': total,
             'spend': spend,
             'countback': countback_tuple,
             'median_score': median_score,
-            'event_scores': event_scores,
-            'num_events': len([s for s in event_scores if s > 0])
+            'event_scores': row_scores,
+            'num_events': played,
+            # Ranking key used by sort_players
+            '_sort_key': (-total, spend, countback_key, player_name.lower())
         }
         
         # Preserve original row data
-        for col in player_df.columns:
+        for col, value in record.items():
             if col not in player_data:
-                player_data[col] = row[col]
+                player_data[col] = value
         
         players.append(player_data)
     
@@ -133,26 +125,84 @@ def sort_players(players: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     3. Countback (tuple comparison)
     4. Alphabetical by name
     
+    The key is (-total_points, spend, negated countback, lowercase name), so
+    ascending order ranks higher points, lower spend and higher countback
+    first. process_leaderboard precomputes it; other player dictionaries get
+    it computed here. The numeric parts are stacked into one matrix and
+    sorted with a single stable np.lexsort, names breaking the last ties.
+    
     Args:
         players: List of player dictionaries
         
     Returns:
         Sorted list of players
     """
-    def sort_key(player: Dict[str, Any]) -> tuple:
-        # For countback, we want descending order (higher is better)
-        # Since tuple comparison is lexicographic, we negate each element
-        countback_tuple = player['countback']
-        negated_countback = tuple(-x if isinstance(x, (int, float)) else x for x in countback_tuple)
+    if not players:
+        return []
+    
+    keys = [player_sort_key(player) for player in players]
+    numeric_keys = np.array([(key[0], key[1], *key[2]) for key in keys], dtype=np.float64)
+    names = np.array([key[3] for key in keys], dtype=str)
+    
+    # lexsort treats its last key as primary: names first, then the numeric
+    # columns from the last countback entry back to -total_points
+    order = np.lexsort((names, *numeric_keys.T[::-1]))
+    return [players[i] for i in order.tolist()]
+
+
+def player_sort_key(player: Dict[str, Any]) -> tuple:
+    """
+    Get a player's ranking key, computing it if it wasn't precomputed.
+    
+    Args:
+        player: Player dictionary with name, total_points, spend and countback
+        
+    Returns:
+        Key for sort_players
+    """
+    key = player.get('_sort_key')
+    if key is not None:
+        return key
+    
+    # Pad like process_leaderboard's keys so both kinds compare consistently;
+    # negated for descending order (higher countback is better)
+    countback = [float(x) for x in player['countback']]
+    countback += [0.0] * (COUNTBACK_LENGTH - len(countback))
+    negated_countback = tuple(-x for x in countback)
+    
+    return (-player['total_points'], player['spend'], negated_countback, player['name'].lower())
+
+
+def write_xlsx(df: pd.DataFrame, xlsx_path: Path):
+    """
+    Write a dataframe to XLSX, streaming rows to disk.
+    
+    Uses xlsxwriter's constant_memory mode, which flushes each row as soon as
+    the next one starts, so memory stays flat regardless of sheet size. Rows
+    are written in order directly (pandas' to_excel writes column by column,
+    which constant_memory cannot handle).
+    
+    Args:
+        df: Dataframe to write (header row + one row per record)
+        xlsx_path: Output file path
+    """
+    # Date format and timezone handling as in pandas' to_excel, so datetime
+    # cells stay dates rather than raw serial numbers
+    workbook = xlsxwriter.Workbook(str(xlsx_path), {
+        'constant_memory': True,
+        'default_date_format': 'YYYY-MM-DD HH:MM:SS',
+        'remove_timezone': True,
+    })
+    try:
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, [str(col) for col in df.columns], workbook.add_format({'bold': True}))
         
-        return (
-            -player['total_points'],  # Negative for descending
-            player['spend'],          # Ascending
-            negated_countback,        # Negated for descending (higher countback is better)
-            player['name'].lower()    # Alphabetical
-        )
-    
-    return sorted(players, key=sort_key)
+        # Missing values become blank cells, like pandas' to_excel
+        values = df.astype(object).where(df.notna(), None)
+        for row_idx, row in enumerate(values.itertuples(index=False, name=None), 1):
+            worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
 
 
 def save_results(players: List[Dict[str, Any]], output_dir: Path):
@@ -167,9 +217,9 @@ def save_results(players: List[Dict[str, Any]], output_dir: Path):
     
     # Prepare dataframe for CSV/XLSX (exclude complex types)
     df_data = []
-    for player in players:
+    for rank, player in enumerate(players, 1):
         row = {
-            'rank': players.index(player) + 1,
+            'rank': rank,
             'name': player['name'],
             'total_points': player['total_points'],
             'spend': player['spend'],
@@ -179,7 +229,7 @@ def save_results(players: List[Dict[str, Any]], output_dir: Path):
         }
         # Add original columns (excluding name, total_points, spend if they were in original)
         for key, value in player.items():
-            if key not in ['name', 'total_points', 'spend', 'countback', 'median_score', 'event_scores', 'num_events']:
+            if key not in ['name', 'total_points', 'spend', 'countback', 'median_score', 'event_scores', 'num_events', '_sort_key']:
                 # Convert complex types to strings
                 if isinstance(value, (list, tuple, dict)):
                     row[key] = str(value)
@@ -196,21 +246,24 @@ def save_results(players: List[Dict[str, Any]], output_dir: Path):
     
     # Save XLSX
     xlsx_path = output_dir / 'leaderboard_sorted.xlsx'
-    df.to_excel(xlsx_path, index=False, engine='openpyxl')
+    write_xlsx(df, xlsx_path)
     print(f"Saved XLSX to {xlsx_path}")
     
     # Save JSON (include full data)
     json_path = output_dir / 'leaderboard_sorted.json'
     # Convert countback tuple to list for JSON serialization
     json_data = []
-    for player in players:
+    for rank, player in enumerate(players, 1):
         json_player = player.copy()
+        json_player.pop('_sort_key', None)
         json_player['countback'] = list(json_player['countback'])
-        json_player['rank'] = players.index(player) + 1
+        json_player['rank'] = rank
         json_data.append(json_player)
     
-    with open(json_path, 'w') as f:
-        json.dump(json_data, f, indent=2, default=str)
+    # NaN cells are written as null; non-string column names are stringified
+    options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    with open(json_path, 'wb') as f:
+        f.write(orjson.dumps(json_data, default=str, option=options))
     print(f"Saved JSON to {json_path}")
 
 
@@ -0,0 +1,98 @@
+"""
+Unit tests for leaderboard ranking output.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from rank import process_leaderboard, save_results, sort_players, write_xlsx
+from utils import calculate_countback, leaderboard_to_arrays
+
+
+def _reference_key(player):
+    """Ranking key built from scratch with the scalar countback."""
+    countback = calculate_countback(player['event_scores'])
+    return (-player['total_points'], player['spend'], tuple(-x for x in countback), player['name'].lower())
+
+
+def _random_leaderboard(rng, n_players):
+    """Leaderboard with few distinct scores, so ties go deep into countback."""
+    df = pd.DataFrame({'Player Name': [f"p{i}" for i in rng.permutation(n_players)]})
+    for j in range(5):
+        df[f"Event {j}"] = rng.integers(0, 4, n_players) * 1.0
+    df['Spend'] = rng.integers(0, 2, n_players)
+    df.loc[:4, [f"Event {j}" for j in range(5)]] = 0.0
+    return df
+
+
+class TestSortPlayers:
+    """Tests for ranking order."""
+    
+    def test_matches_reference_order(self):
+        rng = np.random.default_rng(0)
+        players = process_leaderboard(_random_leaderboard(rng, 200))
+        result = sort_players(players)
+        expected = sorted(players, key=_reference_key)
+        assert [p['name'] for p in result] == [p['name'] for p in expected]
+    
+    def test_players_from_separate_calls(self):
+        rng = np.random.default_rng(1)
+        a = process_leaderboard(_random_leaderboard(rng, 50))
+        b = process_leaderboard(_random_leaderboard(rng, 50))
+        result = sort_players(a + b)
+        expected = sorted(a + b, key=_reference_key)
+        assert [id(p) for p in result] == [id(p) for p in expected]
+    
+    def test_hand_built_players(self, tmp_path):
+        rng = np.random.default_rng(2)
+        built = process_leaderboard(_random_leaderboard(rng, 30))
+        hand_built = [
+            {'name': 'Zed', 'total_points': 10.0, 'spend': 0.0, 'countback': (5.0, 2),
+             'median_score': 5.0, 'event_scores': [5.0, 5.0], 'num_events': 2},
+            {'name': 'amy', 'total_points': 0.0, 'spend': 0.0, 'countback': (0.0, 0),
+             'median_score': 0.0, 'event_scores': [], 'num_events': 0},
+        ]
+        result = sort_players(built + hand_built)
+        expected = sorted(built + hand_built, key=_reference_key)
+        assert [id(p) for p in result] == [id(p) for p in expected]
+        
+        save_results(result, tmp_path)
+        assert (tmp_path / 'leaderboard_sorted.json').exists()
+    
+    def test_records_match_arrays(self):
+        df = _random_leaderboard(np.random.default_rng(3), 40)
+        players = process_leaderboard(df)
+        names, scores = leaderboard_to_arrays(df)
+        assert [p['name'] for p in players] == names.tolist()
+        assert [p['event_scores'] for p in players] == scores.tolist()
+
+
+class TestWriteXlsx:
+    """Tests for streamed XLSX output."""
+    
+    def test_round_trip(self, tmp_path):
+        df = pd.DataFrame({
+            'name': ['Alice', 'Bob'],
+            'total_points': [12.5, 3.0],
+            'Joined': [pd.Timestamp('2024-01-05'), pd.Timestamp('2023-11-20 08:30')],
+            'note': ['x', None],
+        })
+        xlsx_path = tmp_path / 'out.xlsx'
+        write_xlsx(df, xlsx_path)
+        
+        result = pd.read_excel(xlsx_path, engine='openpyxl')
+        assert list(result.columns) == list(df.columns)
+        assert result['total_points'].tolist() == [12.5, 3.0]
+        assert result['Joined'].tolist() == df['Joined'].tolist()
+        assert result['note'].isna().tolist() == [False, True]
+    
+    def test_timezone_aware_dates(self, tmp_path):
+        df = pd.DataFrame({'Joined': pd.to_datetime(['2024-01-05 10:00']).tz_localize('UTC')})
+        xlsx_path = tmp_path / 'out.xlsx'
+        write_xlsx(df, xlsx_path)
+        
+        result = pd.read_excel(xlsx_path, engine='openpyxl')
+        assert result['Joined'].tolist() == [pd.Timestamp('2024-01-05 10:00')]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,203 @@
+"""
+Unit tests for leaderboard utilities.
+"""
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+import utils
+from utils import (
+    build_score_matrix, calculate_countback, calculate_countback_array, calculate_countback_matrix,
+    calculate_median_score, clean_column, clean_series, clean_value, countback_to_tuple,
+    extract_player_rows, get_score_columns, rank_by_countback, classify_columns,
+)
+
+# Cells covering placeholders, currency text, malformed numbers and decimals
+# whose parsing is prone to last-digit rounding differences
+MIXED_CELLS = [
+    1.5, None, np.nan, ' $1,200 ', 'D$Q', 'd$q', 'Null', '-', '.', 7, '–', 'n/a', '1.2.3', '-5',
+    '12abc', True, '', '  ', 0, -3.25, '$-4.5', pd.NaT, float('inf'), '5.', '.5', '-.5', '--5',
+    '1e5', 'inf', '1_000', '+5', '٣', '152.43000000000004', '128.07999999999998', '81.58000000000001',
+    152.43000000000004, np.float64(0.1), np.int64(4),
+]
+
+
+def reference_countback(scores):
+    """Countback built with the original pure-Python algorithm."""
+    runs = []
+    for score in sorted((s for s in scores if s > 0), reverse=True):
+        if runs and runs[-1][0] == score:
+            runs[-1][1] += 1
+        else:
+            runs.append([score, 1])
+    if not runs:
+        return (0.0, 0)
+    countback = [x for run in runs for x in run][:20]
+    return tuple(countback + [0.0] * (20 - len(countback)))
+
+
+def random_scores(rng, shape):
+    """Scores with repeats, zeros, negatives and two-decimal values."""
+    whole = rng.integers(-2, 8, size=shape).astype(np.float64)
+    decimal = np.round(rng.normal(10, 5, size=shape), 2)
+    return np.where(rng.random(shape) < 0.5, whole, decimal)
+
+
+class TestScoreMatrixEngines:
+    """Tests that the pandas and Polars engines clean scores identically."""
+    
+    def test_mixed_columns_match(self):
+        pytest.importorskip("polars")
+        values = [
+            1.5, None, np.nan, ' $1,200 ', 'D$Q', 'd$q', '-', '.', 7, '–', 'n/a', '1.2.3', '-5',
+            '12abc', True, '', '  ', 0, -3.25, '$-4.5', pd.NaT, float('inf'), '5.', '.5', '1e5',
+            1e16, 1e20, 1.2345678901234568e17, 1e-05, '٣', '٣.٥', 152.43000000000004,
+            np.float64(0.1), np.int64(4),
+        ]
+        df = pd.DataFrame({
+            'mixed': pd.Series(values, dtype=object),
+            'text': pd.Series([str(v) for v in values], dtype=object),
+            'floats': np.arange(len(values)) * 1.5,
+            'flags': [True] * len(values),
+        })
+        cols = list(df.columns)
+        
+        expected = build_score_matrix(df, cols)
+        result = build_score_matrix(df, cols, engine='polars')
+        np.testing.assert_array_equal(result, expected)
+        assert expected[values.index(1e16), 0] == 1e16
+        assert expected[values.index('٣'), 0] == 3.0
+    
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            build_score_matrix(pd.DataFrame({'a': [1]}), ['a'], engine='spark')
+
+
+class TestCleaning:
+    """Tests that column cleaning matches clean_value cell by cell."""
+    
+    def test_clean_value_cases(self):
+        assert clean_value(' $1,200 ') == 1200.0
+        assert clean_value('D$Q') == 0.0
+        assert clean_value('1e5') == 15.0
+        assert clean_value(None) == 0.0
+    
+    @pytest.mark.parametrize("clean", [clean_series, clean_column])
+    def test_mixed_cells(self, clean):
+        series = pd.Series(MIXED_CELLS, dtype=object)
+        expected = np.array([clean_value(v) for v in MIXED_CELLS])
+        np.testing.assert_array_equal(clean(series), expected)
+    
+    @pytest.mark.parametrize("clean", [clean_series, clean_column])
+    def test_random_decimals(self, clean):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=5000) * 100
+        for series in (pd.Series(values), pd.Series([repr(v) for v in values.tolist()], dtype=object)):
+            expected = np.array([clean_value(v) for v in series])
+            np.testing.assert_array_equal(clean(series), expected)
+    
+    def test_nullable_and_empty_columns(self):
+        for series in (pd.Series([1, None, 3], dtype='Int64'), pd.Series([], dtype=object),
+                       pd.Series(['1.0', None, 'x'], dtype='string'), pd.Series([True, False])):
+            expected = np.array([clean_value(v) for v in series], dtype=np.float64)
+            np.testing.assert_array_equal(clean_column(series), expected)
+
+
+class TestScoreMatrix:
+    """Tests for score matrix construction."""
+    
+    def test_row_sums_match_sequential_sum(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame({f"Event {j}": np.round(rng.uniform(0, 200, 300), 2) for j in range(25)})
+        scores = build_score_matrix(df, list(df.columns))
+        expected = [sum(row) for row in df.itertuples(index=False)]
+        assert scores.sum(axis=1).tolist() == expected
+    
+    def test_column_classification_cached(self):
+        df = pd.DataFrame({'Player Name': ['Alice'], 'Event 1': [1.0]})
+        classify_columns.cache_clear()
+        extract_player_rows(df)
+        get_score_columns(df)
+        assert classify_columns.cache_info().hits == 1
+    
+    def test_classify_columns(self):
+        name_col, spend_col, candidates, lowered = classify_columns(
+            ('Player', 'Event 1', 'Total Points', 'Spend', 'Event 2'))
+        assert name_col == 'Player'
+        assert spend_col == 'Spend'
+        assert candidates == ('Event 1', 'Event 2')
+        assert 'total points' in lowered
+    
+    def test_columns_and_rows(self):
+        df = pd.DataFrame({
+            'Player Name': ['Alice', 'player name', None, ' ', 'Bob'],
+            'Event 1': [1.0, None, 2.0, 3.0, 'D$Q'],
+            'Event 2': [None] * 5,
+            'Total Points': [1, 2, 3, 4, 5],
+        })
+        players = extract_player_rows(df)
+        assert players['Player Name'].tolist() == ['Alice', 'Bob']
+        assert get_score_columns(players) == ['Event 1']
+        assert build_score_matrix(players, ['Event 1']).tolist() == [[1.0], [0.0]]
+    
+    def test_string_dtypes_match(self, monkeypatch):
+        pytest.importorskip("pyarrow")
+        df = pd.DataFrame({
+            'Player Name': ['Alice', 'player name', None, ' ', 'Bob', np.nan, 7, 'EVENT 1', '\tCarl '],
+            'Event 1': range(9),
+        })
+        monkeypatch.setattr(utils, '_HAS_PYARROW', True)
+        arrow_rows = extract_player_rows(df)
+        monkeypatch.setattr(utils, '_HAS_PYARROW', False)
+        python_rows = extract_player_rows(df)
+        assert arrow_rows.index.tolist() == python_rows.index.tolist() == [0, 4, 6, 8]
+
+
+class TestCountbackMatrix:
+    """Tests for batched countback."""
+    
+    def test_matches_reference(self):
+        rng = np.random.default_rng(2)
+        for n_events in (0, 1, 5, 25, 40):
+            scores = random_scores(rng, (50, n_events))
+            countbacks = calculate_countback_matrix(scores)
+            assert countbacks.shape == (50, 20)
+            for row, countback in zip(scores.tolist(), countbacks.tolist()):
+                expected = reference_countback(row)
+                result = countback_to_tuple(countback)
+                assert result == expected
+                assert [type(x) for x in result] == [type(x) for x in expected]
+                assert calculate_countback(row) == expected
+                np.testing.assert_array_equal(calculate_countback_array(row), countback)
+    
+    def test_nan_scores_ignored(self):
+        scores = np.array([[np.nan, 3.0, 3.0, 0.0]])
+        assert countback_to_tuple(calculate_countback_matrix(scores)[0].tolist())[:2] == (3.0, 2)
+    
+    def test_rank_by_countback(self):
+        rng = np.random.default_rng(3)
+        scores = rng.integers(0, 4, size=(200, 6)).astype(np.float64)
+        ranks = rank_by_countback(calculate_countback_matrix(scores))
+        keys = [tuple(-x for x in reference_countback(row)) for row in scores.tolist()]
+        distinct = sorted(set(keys))
+        assert ranks.tolist() == [distinct.index(key) for key in keys]
+        assert rank_by_countback(np.zeros((0, 20))).size == 0
+    
+    def test_median_score(self):
+        rng = np.random.default_rng(4)
+        for n in range(12):
+            scores = random_scores(rng, n).tolist()
+            positive = [s for s in scores if s > 0]
+            assert calculate_median_score(scores) == (float(np.median(positive)) if positive else 0.0)
+    
+    def test_large_scores_stay_exact(self):
+        scores = np.array([[1e300, 1e300, 5.0], [3.0e38 * 10, 2.0, 0.0]])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            countbacks = calculate_countback_matrix(scores)
+        for row, countback in zip(scores.tolist(), countbacks.tolist()):
+            assert countback_to_tuple(countback) == calculate_countback(row)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -2,9 +2,39 @@
 Utility functions for leaderboard ranking.
 """
 import re
+from functools import lru_cache
 from typing import Any, List, Tuple
 import pandas as pd
 import numpy as np
+from numba import njit
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Placeholder values that count as no score
+_INVALID = frozenset(('D$Q', '–', '-', '', 'NAN', 'NONE', 'NULL', 'N/A'))
+
+# Exact-case lookup for the common spellings of the placeholders
+_SENTINEL_MAP = {token: 0.0 for value in _INVALID for token in (value, value.lower())}
+
+# Anything other than digits, decimal point and minus sign
+_NONNUM_RE = re.compile(r'[^\d.\-]')
+
+# What's left of a cell after _NONNUM_RE that float() accepts
+_NUMBER_RE = r'-?(?:\d+\.?\d*|\.\d+)'
+
+# Column name keywords for the name/identifier column, and for columns that
+# are never event scores
+_NAME_RE = re.compile(r'name|player|id|team')
+_SKIP_RE = re.compile(r'name|player|id|team|total|spend')
 
 
 def clean_value(value: Any) -> float:
@@ -23,15 +53,37 @@ def clean_value(value: Any) -> float:
         return 0.0
     
     # Convert to string and strip whitespace
-    value_str = str(value).strip()
+    return _clean_str(str(value).strip())
+
+
+@lru_cache(maxsize=4096)
+def _clean_str(value_str: str) -> float:
+    """
+    Clean a stripped cell string; cached since sheets repeat few tokens.
     
-    # Handle known invalid patterns
-    if value_str.upper() in ['D$Q', '–', '-', '', 'NAN', 'NONE', 'NULL', 'N/A']:
+    Args:
+        value_str: Stripped string form of a non-missing cell
+        
+    Returns:
+        Cleaned float value
+    """
+    # Handle known invalid patterns, upper-casing only for unusual casings
+    hit = _SENTINEL_MAP.get(value_str)
+    if hit is not None:
+        return hit
+    if value_str.upper() in _INVALID:
         return 0.0
     
+    # Plain numbers like "12.5" or "-3" parse directly, skipping the regex.
+    # Anything float() would read differently from the cleaned string
+    # ("1e5", "inf", "1_000") still takes the regex path below
+    digits = value_str[1:] if value_str[:1] == '-' else value_str
+    if digits.replace('.', '', 1).isdecimal():
+        return float(value_str)
+    
     # Try to extract numeric value (handles cases like "$100" or "100.5")
     # Remove currency symbols and other non-numeric characters except decimal point and minus
-    cleaned = re.sub(r'[^\d\.\-]', '', value_str)
+    cleaned = _NONNUM_RE.sub('', value_str)
     
     if not cleaned or cleaned == '-' or cleaned == '.':
         return 0.0
@@ -43,7 +95,108 @@ def clean_value(value: Any) -> float:
         return 0.0
 
 
-def extract_player_rows(df: pd.DataFrame) -> pd.DataFrame:
+def clean_series(series: pd.Series) -> np.ndarray:
+    """
+    Clean and normalize a whole column from the leaderboard.
+    
+    Vectorized equivalent of applying clean_value to every cell.
+    
+    Args:
+        series: Column to clean (any dtype)
+        
+    Returns:
+        Float64 array of cleaned values
+    """
+    # Python-backed strings keep the regexes on Python's re (Arrow's are
+    # ASCII-only for \d), matching clean_value for digits such as '٣'
+    text = series.astype(object).where(series.notna(), '').astype('string[python]').str.strip()
+    invalid = text.str.upper().isin(_INVALID).to_numpy()
+    cleaned = text.str.replace(_NONNUM_RE, '', regex=True)
+    
+    # Leftovers such as '-', '.' or '1-2' don't parse and stay 0.0
+    valid = cleaned.str.fullmatch(_NUMBER_RE).to_numpy(dtype=bool) & ~invalid
+    result = np.zeros(len(series), dtype=np.float64)
+    # numpy's string parsing rounds exactly like float(), unlike pd.to_numeric
+    result[valid] = cleaned.to_numpy(dtype=object)[valid].astype(np.float64)
+    return result
+
+
+def clean_column(series: pd.Series) -> np.ndarray:
+    """
+    Clean and normalize a whole column, skipping text handling for numbers.
+    
+    Cells that are already numbers are taken as-is (non-finite ones become
+    0.0); only text cells go through clean_series.
+    
+    Args:
+        series: Column to clean (any dtype)
+        
+    Returns:
+        Float64 array of cleaned values
+    """
+    is_number, result = _clean_numbers(series)
+    if not is_number.all():
+        result[~is_number] = clean_series(series[~is_number])
+    return result
+
+
+def _clean_numbers(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Take the cells of a column that are already numbers.
+    
+    Args:
+        series: Column to clean (any dtype)
+        
+    Returns:
+        Tuple of (is_number, result): a mask of numeric cells, and a float64
+        array holding them (non-finite ones as 0.0) with 0.0 everywhere else
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.ones(len(series), dtype=bool), np.where(np.isfinite(values), values, 0.0)
+    
+    # Mixed columns: only real numbers take the fast path. Strings are left to
+    # the text cleaners, as pd.to_numeric parses some decimals an ulp off float()
+    is_number = series.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).to_numpy(dtype=bool)
+    result = np.zeros(len(series), dtype=np.float64)
+    if is_number.any():
+        numbers = series[is_number].to_numpy(dtype=np.float64)
+        result[is_number] = np.where(np.isfinite(numbers), numbers, 0.0)
+    return is_number, result
+
+
+@lru_cache(maxsize=64)
+def classify_columns(columns: Tuple) -> Tuple[Any, Any, Tuple, frozenset]:
+    """
+    Classify columns by name; cached since a sheet's layout rarely changes.
+    
+    Args:
+        columns: Column labels of the leaderboard
+        
+    Returns:
+        Tuple of (name column or None, spend column or None, candidate score
+        columns, lowercase column names)
+    """
+    name_col = None
+    spend_col = None
+    candidate_cols = []
+    
+    for col in columns:
+        col_lower = str(col).lower()
+        # Name column: first one containing 'name', 'player', etc.
+        if name_col is None and _NAME_RE.search(col_lower) is not None:
+            name_col = col
+        # Spend column: last one mentioning spend, other than a total points column
+        if 'spend' in col_lower and not ('total' in col_lower and 'point' in col_lower):
+            spend_col = col
+        # Skip name/identifier, total and spend columns as score candidates
+        if _SKIP_RE.search(col_lower) is None:
+            candidate_cols.append(col)
+    
+    return name_col, spend_col, tuple(candidate_cols), frozenset(str(c).lower() for c in columns)
+
+
+def extract_player_rows(df: pd.DataFrame, copy: bool = False) -> pd.DataFrame:
     """
     Extract only player rows from the dataframe.
     
@@ -52,34 +205,27 @@ def extract_player_rows(df: pd.DataFrame) -> pd.DataFrame:
     
     Args:
         df: Raw dataframe from Excel
+        copy: Return an independent copy, for callers that modify the result
         
     Returns:
         DataFrame with only player rows
     """
-    # Try to identify the name column (usually first column or contains 'name', 'player', etc.)
-    name_col = None
-    for col in df.columns:
-        col_lower = str(col).lower()
-        if any(keyword in col_lower for keyword in ['name', 'player', 'id', 'team']):
-            name_col = col
-            break
+    name_col, _, _, column_names = classify_columns(tuple(df.columns))
     
     if name_col is None:
         # Assume first column is the identifier
         name_col = df.columns[0]
     
-    # Filter out rows where name is empty or NaN
-    player_df = df[df[name_col].notna() & (df[name_col].astype(str).str.strip() != '')].copy()
+    # Arrow-backed strings run strip/lower/isin over one buffer when available
+    names = df[name_col].astype('string[pyarrow]' if _HAS_PYARROW else 'string')
     
-    # Filter out header rows (rows that might be duplicates of column names)
-    if len(player_df) > 0:
-        # Remove rows where the name matches any column name
-        column_names = [str(c).lower() for c in df.columns]
-        player_df = player_df[
-            ~player_df[name_col].astype(str).str.lower().isin(column_names)
-        ]
+    # Keep rows whose name is non-empty (missing names have no length) and
+    # isn't a repeated header (matches a column name), in one boolean pass
+    has_name = (names.str.strip().str.len() > 0).to_numpy(dtype=bool, na_value=False)
+    is_header = names.str.lower().isin(column_names).to_numpy(dtype=bool)
     
-    return player_df
+    player_df = df.loc[has_name & ~is_header]
+    return player_df.copy() if copy else player_df
 
 
 def get_score_columns(df: pd.DataFrame) -> List[str]:
@@ -93,22 +239,12 @@ def get_score_columns(df: pd.DataFrame) -> List[str]:
         List of column names that appear to be score columns
     """
     score_cols = []
+    _, _, candidate_cols, _ = classify_columns(tuple(df.columns))
     
-    for col in df.columns:
-        col_str = str(col).lower()
-        # Skip name/identifier columns
-        if any(keyword in col_str for keyword in ['name', 'player', 'id', 'team', 'total', 'spend']):
-            continue
-        
-        # Check if column contains numeric data
-        numeric_count = 0
-        for val in df[col]:
-            try:
-                cleaned = clean_value(val)
-                if cleaned != 0.0 or pd.notna(val):
-                    numeric_count += 1
-            except:
-                pass
+    for col in candidate_cols:
+        # Check if column contains data; a cell that cleans to a non-zero
+        # value is never missing, so non-missing cells are all that count
+        numeric_count = np.count_nonzero(df[col].notna().to_numpy())
         
         # If at least some values are numeric, consider it a score column
         if numeric_count > 0:
@@ -117,6 +253,157 @@ def get_score_columns(df: pd.DataFrame) -> List[str]:
     return score_cols
 
 
+def build_score_matrix(player_df: pd.DataFrame, score_cols: List[str], engine: str = 'pandas') -> np.ndarray:
+    """
+    Clean score columns into one contiguous matrix.
+    
+    Args:
+        player_df: DataFrame of player rows
+        score_cols: Score columns, in event order
+        engine: 'pandas', or 'polars' to clean with clean_score_columns_polars
+        
+    Returns:
+        (n_players, n_events) float64 array of cleaned scores
+    """
+    if engine == 'polars':
+        return clean_score_columns_polars(player_df, score_cols)
+    if engine != 'pandas':
+        raise ValueError(f"Unknown engine: {engine!r}")
+    
+    # Column-major, so each event column is written contiguously and row
+    # sums add events left to right, like summing the original rows
+    scores = np.empty((len(player_df), len(score_cols)), dtype=np.float64, order='F')
+    for j, col in enumerate(score_cols):
+        scores[:, j] = clean_column(player_df[col])
+    return scores
+
+
+def clean_score_columns_polars(player_df: pd.DataFrame, score_cols: List[str]) -> np.ndarray:
+    """
+    Clean score columns with Polars, for large sheets.
+    
+    Applies the same rules as clean_column: cells that are already numbers
+    are taken as-is, and only text cells are cleaned, with Polars evaluating
+    all text columns in parallel. Requires the optional polars package.
+    
+    Args:
+        player_df: DataFrame of player rows
+        score_cols: Score columns, in event order
+        
+    Returns:
+        (n_players, n_events) float64 array of cleaned scores
+    """
+    if pl is None:
+        raise ImportError("polars is required for engine='polars'")
+    
+    n_players = len(player_df)
+    scores = np.zeros((n_players, len(score_cols)), dtype=np.float64, order='F')
+    text_masks = {}
+    columns = {}
+    exprs = []
+    
+    for j, col in enumerate(score_cols):
+        series = player_df[col]
+        is_number, scores[:, j] = _clean_numbers(series)
+        is_text = ~is_number & series.notna().to_numpy()
+        if not is_text.any():
+            continue
+        
+        # Non-text cells are left null and only text cells are cleaned
+        name = f"c{j}"
+        text = np.full(n_players, None, dtype=object)
+        text[is_text] = series[is_text].astype(str).to_numpy(dtype=object)
+        columns[name] = pl.Series(name, text.tolist(), dtype=pl.String)
+        text_masks[j] = is_text
+        
+        stripped = pl.col(name).str.strip_chars()
+        cleaned = stripped.str.replace_all(_NONNUM_RE.pattern, '')
+        valid = (
+            ~stripped.str.to_uppercase().is_in(list(_INVALID))
+            & cleaned.str.contains(f"^(?:{_NUMBER_RE})$")
+        ).fill_null(False)
+        # Valid numbers Polars can't cast (e.g. non-ASCII digits) stay null
+        exprs.append(pl.when(valid).then(cleaned.cast(pl.Float64, strict=False)).otherwise(0.0).alias(name))
+    
+    if not exprs:
+        return scores
+    
+    cleaned_df = pl.DataFrame(columns).select(exprs)
+    for j, values in zip(text_masks, cleaned_df.to_numpy().T):
+        is_text = text_masks[j]
+        values = values[is_text].astype(np.float64)
+        unparsed = np.isnan(values)
+        if unparsed.any():
+            values[unparsed] = [clean_value(v) for v in player_df[score_cols[j]][is_text][unparsed]]
+        scores[is_text, j] = values
+    return scores
+
+
+def player_arrays(player_df: pd.DataFrame, engine: str = 'pandas') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert extracted player rows into player names and a score matrix.
+    
+    Args:
+        player_df: DataFrame of player rows (see extract_player_rows)
+        engine: Score cleaning engine, 'pandas' or 'polars'
+        
+    Returns:
+        Tuple of (names, scores): an object array of stripped player names
+        and the (n_players, n_events) float64 score matrix
+    """
+    name_col = classify_columns(tuple(player_df.columns))[0]
+    if name_col is None:
+        name_col = player_df.columns[0]
+    
+    names = np.array([str(name).strip() for name in player_df[name_col]], dtype=object)
+    return names, build_score_matrix(player_df, get_score_columns(player_df), engine=engine)
+
+
+def leaderboard_to_arrays(df: pd.DataFrame, engine: str = 'pandas') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert a raw leaderboard into player names and a score matrix.
+    
+    Args:
+        df: Raw dataframe from Excel
+        engine: Score cleaning engine, 'pandas' or 'polars'
+        
+    Returns:
+        Tuple of (names, scores), as returned by player_arrays
+    """
+    return player_arrays(extract_player_rows(df), engine=engine)
+
+
+@njit(cache=True)
+def _countback_nb(scores: np.ndarray) -> np.ndarray:
+    """
+    Compiled countback kernel.
+    
+    Args:
+        scores: Float64 array of event scores
+        
+    Returns:
+        Length-20 float64 array of (score, frequency, ...) pairs, highest
+        score first, zero-padded
+    """
+    # Remove zeros (they don't contribute to countback)
+    positive = scores[scores > 0.0].copy()
+    positive.sort()
+    
+    out = np.zeros(20)
+    i = positive.size - 1
+    j = 0
+    while i >= 0 and j < 19:
+        value = positive[i]
+        count = 0
+        while i >= 0 and positive[i] == value:
+            count += 1
+            i -= 1
+        out[j] = value
+        out[j + 1] = count
+        j += 2
+    return out
+
+
 def calculate_countback(scores: List[float]) -> Tuple[float, int, ...]:
     """
     Calculate countback tuple for tie-breaking.
@@ -129,43 +416,113 @@ def calculate_countback(scores: List[float]) -> Tuple[float, int, ...]:
     Returns:
         Tuple for countback comparison (higher is better)
     """
-    if not scores:
-        return (0.0, 0)
-    
-    # Remove zeros (they don't contribute to countback)
-    non_zero_scores = [s for s in scores if s > 0]
+    return countback_to_tuple(calculate_countback_array(scores).tolist())
+
+
+def calculate_countback_array(scores: List[float]) -> np.ndarray:
+    """
+    Calculate the countback for one player as a padded array.
     
-    if not non_zero_scores:
-        return (0.0, 0)
+    Args:
+        scores: List of all event scores for a player
+        
+    Returns:
+        Length-20 float64 array of (score, frequency, ...) pairs, highest
+        score first, zero-padded
+    """
+    return _countback_nb(np.asarray(scores, dtype=np.float64))
+
+
+def calculate_countback_matrix(scores: np.ndarray) -> np.ndarray:
+    """
+    Calculate countbacks for many players at once.
     
-    # Sort in descending order
-    sorted_scores = sorted(non_zero_scores, reverse=True)
-    
-    # Build countback tuple: (score, frequency, next_score, frequency, ...)
-    countback = []
-    current_score = None
-    current_count = 0
-    
-    for score in sorted_scores:
-        if score == current_score:
-            current_count += 1
-        else:
-            if current_score is not None:
-                countback.extend([current_score, current_count])
-            current_score = score
-            current_count = 1
-    
-    # Add the last score
-    if current_score is not None:
-        countback.extend([current_score, current_count])
-    
-    # Pad with zeros to ensure consistent tuple length for comparison
-    # Use a reasonable max length (e.g., 20 elements)
+    Args:
+        scores: (n_players, n_events) array of event scores
+        
+    Returns:
+        (n_players, 20) float64 array of (score, frequency, ...) pairs per
+        player, highest score first, zero-padded
+    """
     max_length = 20
-    while len(countback) < max_length:
-        countback.append(0.0)
+    n_players = scores.shape[0]
+    out = np.zeros((n_players, max_length), dtype=np.float64)
+    if scores.size == 0:
+        return out
+    
+    # Sort each row descending with non-positive scores zeroed (they sort last)
+    positive_scores = np.where(scores > 0, scores, 0.0)
+    ordered = np.sort(positive_scores, axis=1)[:, ::-1]
+    positive = ordered > 0
+    
+    # A run starts wherever a positive score differs from its left neighbour
+    starts = positive.copy()
+    starts[:, 1:] &= ordered[:, 1:] != ordered[:, :-1]
+    run = np.cumsum(starts, axis=1) - 1
+    
+    # Only the first max_length // 2 runs fit in the countback
+    kept = positive & (run < max_length // 2)
+    rows = np.broadcast_to(np.arange(n_players)[:, None], ordered.shape)
+    slots = rows[kept] * max_length + 2 * run[kept]
+    
+    flat = out.reshape(-1)
+    flat += np.bincount(slots + 1, minlength=flat.size)
+    first = starts[kept]
+    flat[slots[first]] = ordered[kept][first]
+    return out
+
+
+def rank_by_countback(countbacks: np.ndarray) -> np.ndarray:
+    """
+    Rank players by countback alone.
     
-    return tuple(countback[:max_length])
+    Args:
+        countbacks: (n_players, 20) countback matrix, as from
+            calculate_countback_matrix
+        
+    Returns:
+        Int array of dense ranks per player: 0 for the best countback,
+        players with identical countbacks share a rank. Ranks are relative
+        to this matrix and can't be compared across calls
+    """
+    n_players = countbacks.shape[0]
+    if n_players == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    # lexsort treats its last key as primary, so feed the columns reversed;
+    # negating makes higher scores and frequencies sort first
+    order = np.lexsort((-countbacks).T[::-1])
+    ordered = countbacks[order]
+    
+    new_rank = np.empty(n_players, dtype=bool)
+    new_rank[0] = True
+    new_rank[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    
+    ranks = np.empty(n_players, dtype=np.int64)
+    ranks[order] = np.cumsum(new_rank) - 1
+    return ranks
+
+
+def countback_to_tuple(countback: List[float]) -> Tuple[float, int, ...]:
+    """
+    Convert a padded countback row into the tuple used for ranking.
+    
+    Args:
+        countback: Length-20 (score, frequency, ...) list, zero-padded
+        
+    Returns:
+        Countback tuple with int frequencies, (0.0, 0) if there are no scores
+    """
+    countback = list(countback)
+    
+    # Frequencies are whole numbers; keep them as ints up to the padding
+    runs = sum(1 for count in countback[1::2] if count > 0)
+    if runs == 0:
+        return (0.0, 0)
+    for i in range(1, 2 * runs, 2):
+        countback[i] = int(countback[i])
+    
+    return tuple(countback)
 
 
 def calculate_median_score(scores: List[float]) -> float:
@@ -178,12 +535,14 @@ def calculate_median_score(scores: List[float]) -> float:
     Returns:
         Median score (0.0 if no scores)
     """
-    if not scores:
-        return 0.0
-    
-    non_zero_scores = [s for s in scores if s > 0]
-    if not non_zero_scores:
+    arr = np.fromiter((s for s in scores if s > 0), dtype=np.float64)
+    if arr.size == 0:
         return 0.0
     
-    return float(np.median(non_zero_scores))
+    # Select the middle element(s) in linear time instead of fully sorting
+    k = arr.size // 2
+    part = np.partition(arr, k)
+    if arr.size & 1:
+        return float(part[k])
+    return float(0.5 * (part[k] + part[:k].max()))
 